@@ -7,6 +7,9 @@
 # the Business Source License, use of this software will be governed
 # by the Apache License, Version 2.0
 
+import concurrent.futures
+from contextlib import contextmanager
+
 
 class RpkRemoteTool:
     """
@@ -15,64 +18,100 @@ class RpkRemoteTool:
     def __init__(self, redpanda, node):
         self._redpanda = redpanda
         self._node = node
+        self._rpk_path = redpanda.find_binary('rpk')
+        self._pending = None
+        self._pending_timeout = 0
+
+    @classmethod
+    def parallel_execute(cls, rpk_tools, fn_name, *args, **kwargs):
+        """
+        Call the method `fn_name` on each of `rpk_tools` concurrently, e.g.
+        to apply the same config change on every node. Returns the results
+        in the same order as `rpk_tools`.
+        """
+        if not rpk_tools:
+            return []
+
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=len(rpk_tools)) as executor:
+            # The list() wrapper is to cause futures to be evaluated here+now
+            # (including throwing any exceptions) and not just spawned in background.
+            return list(
+                executor.map(
+                    lambda rpk: getattr(rpk, fn_name)(*args, **kwargs),
+                    rpk_tools))
+
+    @contextmanager
+    def batch(self):
+        """
+        Queue up the commands issued within the block and run them over a
+        single ssh session on exit, chained with `&&`. Each command runs in
+        its own subshell so that `cd`, `;` or a trailing `&` in one command
+        does not leak into the others. Commands issued in a batch return
+        None, so only use this for commands whose output is not needed.
+        """
+        assert self._pending is None, "rpk batches may not be nested"
+        self._pending = []
+        self._pending_timeout = 0
+        try:
+            yield
+            cmds = self._pending
+        finally:
+            self._pending = None
+
+        if cmds:
+            self._execute(' && '.join(f"( {c} )" for c in cmds),
+                          timeout=self._pending_timeout)
 
     def config_init(self, path=None, timeout=30):
-        cmd = ['init']
-        return self._run_config(cmd, path, timeout)
+        return self._run_config('init', path, timeout)
 
     def config_set(self, key, value, format=None, path=None, timeout=30):
-        cmd = [
-            'set',
-            f"'{key}'",
-            f"'{value}'",
-        ]
+        cmd = f"set '{key}' '{value}'"
 
         if format is not None:
-            cmd += ['--format', format]
+            cmd += f" --format {format}"
 
         return self._run_config(cmd, path=path, timeout=timeout)
 
     def debug_bundle(self, working_dir):
         # Run the bundle command.  It outputs into pwd, so switch to working dir first
         return self._execute(
-            ["cd", working_dir, ";",
-             self._rpk_binary(), "debug", "bundle"])
+            f"cd {working_dir} ; {self._rpk_path} debug bundle")
 
     def cluster_config_force_reset(self, property_name):
-        return self._execute([
-            self._rpk_binary(), 'cluster', 'config', 'force-reset',
-            property_name
-        ])
+        return self._execute(
+            f"{self._rpk_path} cluster config force-reset {property_name}")
 
     def cluster_config_lint(self):
-        return self._execute([self._rpk_binary(), 'cluster', 'config', 'lint'])
+        return self._execute(f"{self._rpk_path} cluster config lint")
 
     def tune(self, tuner):
-        return self._execute([self._rpk_binary(), 'redpanda', 'tune', tuner])
+        return self._execute(f"{self._rpk_path} redpanda tune {tuner}")
 
     def mode_set(self, mode):
-        return self._execute([self._rpk_binary(), 'redpanda', 'mode', mode])
+        return self._execute(f"{self._rpk_path} redpanda mode {mode}")
 
     def redpanda_start(self, log_file, additional_args="", env_vars=""):
-        return self._execute([
-            env_vars,
-            self._rpk_binary(), "redpanda", "start", "-v", additional_args,
-            ">>", log_file, "2>&1", "&"
-        ])
+        return self._execute(
+            f"{env_vars} {self._rpk_path} redpanda start -v {additional_args} >> {log_file} 2>&1 &"
+        )
 
     def _run_config(self, cmd, path=None, timeout=30):
-        cmd = [self._rpk_binary(), 'redpanda', 'config'] + cmd
+        cmd = f"{self._rpk_path} redpanda config {cmd}"
 
         if path is not None:
-            cmd += ['--config', path]
+            cmd += f" --config {path}"
 
         return self._execute(cmd, timeout=timeout)
 
     def _execute(self, cmd, timeout=30):
+        if self._pending is not None:
+            self._pending.append(cmd)
+            self._pending_timeout += timeout
+            return None
+
         return self._node.account.ssh_output(
-            ' '.join(cmd),
+            cmd,
             timeout_sec=timeout,
         ).decode('utf-8')
-
-    def _rpk_binary(self):
-        return self._redpanda.find_binary('rpk')
@@ -182,13 +182,13 @@ tune_disk_irq: true
 
     @cluster(num_nodes=3, log_allow_list=RESTART_LOG_ALLOW_LIST)
     def test_config_change_then_restart_node(self):
-        for node in self.redpanda.nodes:
-            rpk = RpkRemoteTool(self.redpanda, node)
-            key = 'redpanda.admin.port'
-            value = '9641'  # The default is 9644, so we will change it
+        key = 'redpanda.admin.port'
+        value = '9641'  # The default is 9644, so we will change it
 
-            rpk.config_set(key, value)
+        rpks = [RpkRemoteTool(self.redpanda, n) for n in self.redpanda.nodes]
+        RpkRemoteTool.parallel_execute(rpks, 'config_set', key, value)
 
+        for node in self.redpanda.nodes:
             self.redpanda.restart_nodes(node)
 
     @cluster(num_nodes=1)
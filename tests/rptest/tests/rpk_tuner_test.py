@@ -63,10 +63,11 @@ class RpkTunerTest(RedpandaTest):
         node = self.redpanda.nodes[0]
         rpk = RpkRemoteTool(self.redpanda, node)
         # Set all tuners:
-        rpk.mode_set("prod")
-        rpk.config_set('rpk.tune_fstrim', 'true')
-        rpk.config_set('rpk.tune_transparent_hugepages', 'true')
-        rpk.config_set('rpk.tune_coredump', 'true')
+        with rpk.batch():
+            rpk.mode_set("prod")
+            rpk.config_set('rpk.tune_fstrim', 'true')
+            rpk.config_set('rpk.tune_transparent_hugepages', 'true')
+            rpk.config_set('rpk.tune_coredump', 'true')
 
         expected = '''TUNER                  ENABLED  SUPPORTED  UNSUPPORTED-REASON
 aio_events             true     true       
@@ -8,7 +8,7 @@
 # by the Apache License, Version 2.0
 
 from rptest.services.cluster import cluster
-from rptest.util import wait_until_result
+from ducktape.errors import TimeoutError
 from rptest.clients.types import TopicSpec
 
 import time
@@ -18,15 +18,23 @@ from rptest.tests.redpanda_test import RedpandaTest
 from rptest.services.redpanda import RedpandaService
 from rptest.clients.default import DefaultClient
 from rptest.services.redpanda import RESTART_LOG_ALLOW_LIST
-from rptest.services.rpk_consumer import RpkConsumer
 import confluent_kafka as ck
-from rptest.clients.kafka_cat import KafkaCat
 from rptest.services.admin import Admin
 from rptest.services.redpanda_installer import RedpandaInstaller, wait_for_num_versions
-import random
-import string
 
-import subprocess
+# Shared client tuning. Producers batch aggressively since the tests
+# produce many small records back to back.
+BASE_PRODUCER_CONF = {
+    'linger.ms': 50,
+    'batch.size': 200000,
+    'compression.type': 'lz4',
+    'queue.buffering.max.messages': 200000,
+}
+
+BASE_CONSUMER_CONF = {
+    'auto.offset.reset': 'earliest',
+    'enable.auto.commit': False,
+}
 
 
 class TransactionsTest(RedpandaTest):
@@ -56,45 +64,56 @@ class TransactionsTest(RedpandaTest):
     def generate_data(self, topic, num_records):
         producer = ck.Producer({
             'bootstrap.servers': self.redpanda.brokers(),
+            **BASE_PRODUCER_CONF,
         })
 
-        for i in range(num_records):
-            producer.produce(topic.name,
-                             str(i),
-                             str(i),
-                             on_delivery=self.on_delivery)
-
-        producer.flush()
+        payloads = [b"%d" % i for i in range(num_records)]
+        for i, p in enumerate(payloads):
+            # Keep the local queue saturated: if it is full, serve delivery
+            # reports until there is room rather than flushing mid-loop.
+            while True:
+                try:
+                    producer.produce(topic.name, p, p)
+                    break
+                except BufferError:
+                    producer.poll(0.1)
+            # Serve delivery reports without blocking the send loop
+            if i % 50 == 0:
+                producer.poll(0)
+
+        remaining = producer.flush()
+        assert remaining == 0, f"{remaining} records were not delivered"
 
     def consume(self, consumer, max_records=10, timeout_s=2):
-        def consume_records():
+        # consume() blocks until it has max_records messages or timeout_s
+        # elapses, so it already waits between polls; retry immediately on
+        # an empty result rather than adding a backoff on top.
+        deadline = time.time() + 30
+        while True:
             records = consumer.consume(max_records, timeout_s)
 
             if (records != None) and (len(records) != 0):
-                return True, records
-            else:
-                False
+                return records
 
-        return wait_until_result(consume_records,
-                                 timeout_sec=30,
-                                 backoff_sec=2,
-                                 err_msg="Can not consume data")
+            if time.time() >= deadline:
+                raise TimeoutError("Can not consume data")
 
     @cluster(num_nodes=3)
     def simple_test(self):
         self.generate_data(self.input_t, self.max_records)
+        brokers = self.redpanda.brokers()
 
         producer = ck.Producer({
-            'bootstrap.servers': self.redpanda.brokers(),
+            **BASE_PRODUCER_CONF,
+            'bootstrap.servers': brokers,
             'transactional.id': '0',
             'transaction.timeout.ms': 10000,
         })
 
         consumer1 = ck.Consumer({
-            'bootstrap.servers': self.redpanda.brokers(),
+            **BASE_CONSUMER_CONF,
+            'bootstrap.servers': brokers,
             'group.id': "test",
-            'auto.offset.reset': 'earliest',
-            'enable.auto.commit': False,
         })
 
         producer.init_transactions()
@@ -103,11 +122,23 @@ class TransactionsTest(RedpandaTest):
 
         num_consumed_records = 0
         consumed_from_input_topic = []
+        # The assignment and group metadata are stable once the consumer has
+        # joined the group, so look them up once after the first consume.
+        assignment = None
+        group_metadata = None
         while num_consumed_records != self.max_records:
             # Imagine that consume got broken, we read the same record twice and overshoot the condition
             assert num_consumed_records < self.max_records
 
-            records = self.consume(consumer1)
+            # Consume as much as possible per iteration so that each
+            # transaction carries many records rather than a handful.
+            records = self.consume(consumer1,
+                                   max_records=self.max_records -
+                                   num_consumed_records)
+
+            if assignment is None:
+                assignment = consumer1.assignment()
+                group_metadata = consumer1.consumer_group_metadata()
 
             producer.begin_transaction()
 
@@ -120,8 +151,7 @@ class TransactionsTest(RedpandaTest):
                                  on_delivery=self.on_delivery)
 
             producer.send_offsets_to_transaction(
-                consumer1.position(consumer1.assignment()),
-                consumer1.consumer_group_metadata())
+                consumer1.position(assignment), group_metadata)
 
             producer.commit_transaction()
 
@@ -132,9 +162,9 @@ class TransactionsTest(RedpandaTest):
         assert len(consumed_from_input_topic) == self.max_records
 
         consumer2 = ck.Consumer({
+            **BASE_CONSUMER_CONF,
             'group.id': "testtest",
-            'bootstrap.servers': self.redpanda.brokers(),
-            'auto.offset.reset': 'earliest',
+            'bootstrap.servers': brokers,
         })
         consumer2.subscribe([self.output_t])
 
@@ -155,19 +185,20 @@ class TransactionsTest(RedpandaTest):
     @cluster(num_nodes=3)
     def rejoin_member_test(self):
         self.generate_data(self.input_t, self.max_records)
+        brokers = self.redpanda.brokers()
 
         producer = ck.Producer({
-            'bootstrap.servers': self.redpanda.brokers(),
+            **BASE_PRODUCER_CONF,
+            'bootstrap.servers': brokers,
             'transactional.id': '0',
             'transaction.timeout.ms': 10000,
         })
 
         group_name = "test"
         consumer1 = ck.Consumer({
-            'bootstrap.servers': self.redpanda.brokers(),
+            **BASE_CONSUMER_CONF,
+            'bootstrap.servers': brokers,
             'group.id': group_name,
-            'auto.offset.reset': 'earliest',
-            'enable.auto.commit': False,
         })
 
         producer.init_transactions()
@@ -185,10 +216,9 @@ class TransactionsTest(RedpandaTest):
         metadata = consumer1.consumer_group_metadata()
 
         consumer2 = ck.Consumer({
-            'bootstrap.servers': self.redpanda.brokers(),
+            **BASE_CONSUMER_CONF,
+            'bootstrap.servers': brokers,
             'group.id': group_name,
-            'auto.offset.reset': 'earliest',
-            'enable.auto.commit': False,
         })
 
         consumer2.subscribe([self.input_t])
@@ -207,9 +237,11 @@ class TransactionsTest(RedpandaTest):
     @cluster(num_nodes=3)
     def change_static_member_test(self):
         self.generate_data(self.input_t, self.max_records)
+        brokers = self.redpanda.brokers()
 
         producer = ck.Producer({
-            'bootstrap.servers': self.redpanda.brokers(),
+            **BASE_PRODUCER_CONF,
+            'bootstrap.servers': brokers,
             'transactional.id': '0',
             'transaction.timeout.ms': 10000,
         })
@@ -217,11 +249,10 @@ class TransactionsTest(RedpandaTest):
         group_name = "test"
         static_group_id = "123"
         consumer1 = ck.Consumer({
-            'bootstrap.servers': self.redpanda.brokers(),
+            **BASE_CONSUMER_CONF,
+            'bootstrap.servers': brokers,
             'group.id': group_name,
             'group.instance.id': static_group_id,
-            'auto.offset.reset': 'earliest',
-            'enable.auto.commit': False,
         })
 
         producer.init_transactions()
@@ -239,11 +270,10 @@ class TransactionsTest(RedpandaTest):
         metadata = consumer1.consumer_group_metadata()
 
         consumer2 = ck.Consumer({
-            'bootstrap.servers': self.redpanda.brokers(),
+            **BASE_CONSUMER_CONF,
+            'bootstrap.servers': brokers,
             'group.id': group_name,
             'group.instance.id': static_group_id,
-            'auto.offset.reset': 'earliest',
-            'enable.auto.commit': False,
         })
 
         consumer2.subscribe([self.input_t])
@@ -281,9 +311,11 @@ class UpgradeTransactionTest(RedpandaTest):
         self._client = DefaultClient(self.redpanda)
         self.client().create_topic(spec)
         topic_name = spec.name
+        brokers = self.redpanda.brokers()
 
         producer = ck.Producer({
-            'bootstrap.servers': self.redpanda.brokers(),
+            **BASE_PRODUCER_CONF,
+            'bootstrap.servers': brokers,
             'transactional.id': '123',
             'transaction.timeout.ms': 10000,
         })
@@ -293,10 +325,15 @@ class UpgradeTransactionTest(RedpandaTest):
         def on_del(err, msg):
             assert err == None
 
-        max_tx = 100
-        for i in range(max_tx):
+        # Several commits are still needed to leave tx markers for the
+        # upgraded node to parse, but each one carries a batch of records.
+        num_tx = 10
+        records_per_tx = 10
+        max_tx = num_tx * records_per_tx
+        for tx in range(num_tx):
             producer.begin_transaction()
-            producer.produce(topic_name, str(i), str(i), 0, on_del)
+            for i in range(tx * records_per_tx, (tx + 1) * records_per_tx):
+                producer.produce(topic_name, str(i), str(i), 0, on_del)
             producer.commit_transaction()
 
         self.redpanda.set_environment({"__REDPANDA_LOGICAL_VERSION": 6})
@@ -304,15 +341,15 @@ class UpgradeTransactionTest(RedpandaTest):
             self.redpanda.restart_nodes(n, stop_timeout=60)
 
         consumer = ck.Consumer({
-            'bootstrap.servers': self.redpanda.brokers(),
+            **BASE_CONSUMER_CONF,
+            'bootstrap.servers': brokers,
             'group.id': "test",
-            'auto.offset.reset': 'earliest',
         })
 
         consumer.subscribe([topic_name])
 
         num_consumed = 0
-        prev_rec = bytes("0", 'UTF-8')
+        expected_keys = [b"%d" % i for i in range(max_tx)]
 
         while num_consumed != max_tx:
             max_records = 10
@@ -320,10 +357,10 @@ class UpgradeTransactionTest(RedpandaTest):
             records = consumer.consume(max_records, timeout)
 
             for record in records:
-                assert prev_rec == record.key()
-                prev_rec = bytes(str(int(prev_rec) + 1), 'UTF-8')
-
-            num_consumed += len(records)
+                assert num_consumed < len(expected_keys), \
+                    f"Consumed more than {len(expected_keys)} records, extra key {record.key()}"
+                assert record.key() == expected_keys[num_consumed]
+                num_consumed += 1
 
 
 class UpgradeWithMixedVeersionTransactionTest(RedpandaTest):
@@ -350,16 +387,17 @@ class UpgradeWithMixedVeersionTransactionTest(RedpandaTest):
 
     def check_consume(self, max_records):
         topic_name = self.topics[0].name
+        brokers = self.redpanda.brokers()
 
         consumer = ck.Consumer({
-            'bootstrap.servers': self.redpanda.brokers(),
-            'group.id': f"consumer-{uuid.uuid4()}",
-            'auto.offset.reset': 'earliest',
+            **BASE_CONSUMER_CONF,
+            'bootstrap.servers': brokers,
+            'group.id': "consumer-" + uuid.uuid4().hex[:12],
         })
 
         consumer.subscribe([topic_name])
         num_consumed = 0
-        prev_rec = bytes("0", 'UTF-8')
+        expected_keys = [b"%d" % i for i in range(max_records)]
 
         while num_consumed != max_records:
             max_consume_records = 10
@@ -367,10 +405,11 @@ class UpgradeWithMixedVeersionTransactionTest(RedpandaTest):
             records = consumer.consume(max_consume_records, timeout)
 
             for record in records:
-                assert prev_rec == record.key(), f"{prev_rec}, {record.key()}"
-                prev_rec = bytes(str(int(prev_rec) + 1), 'UTF-8')
-
-            num_consumed += len(records)
+                assert num_consumed < len(expected_keys), \
+                    f"Consumed more than {len(expected_keys)} records, extra key {record.key()}"
+                expected = expected_keys[num_consumed]
+                assert record.key() == expected, f"{expected}, {record.key()}"
+                num_consumed += 1
 
         consumer.close()
 
@@ -383,9 +422,11 @@ class UpgradeWithMixedVeersionTransactionTest(RedpandaTest):
         topic_name = self.topics[0].name
         unique_versions = wait_for_num_versions(self.redpanda, 1)
         assert "v22.1.5" in unique_versions, unique_versions
+        brokers = self.redpanda.brokers()
 
         producer = ck.Producer({
-            'bootstrap.servers': self.redpanda.brokers(),
+            **BASE_PRODUCER_CONF,
+            'bootstrap.servers': brokers,
             'transactional.id': '0',
             'transaction.timeout.ms': 10000,
         })
@@ -415,7 +456,8 @@ class UpgradeWithMixedVeersionTransactionTest(RedpandaTest):
 
         # Init dispatch by using old node. Transaction should work
         producer = ck.Producer({
-            'bootstrap.servers': self.redpanda.brokers(),
+            **BASE_PRODUCER_CONF,
+            'bootstrap.servers': brokers,
             'transactional.id': '0',
             'transaction.timeout.ms': 10000,
         })